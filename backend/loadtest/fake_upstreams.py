@@ -0,0 +1,109 @@
+"""Local stand-ins for Nominatim and OpenRouteService.
+
+Point the backend at them with:
+
+    NOMINATIM_DOMAIN=127.0.0.1:8900 NOMINATIM_SCHEME=http
+    ORS_BASE_URL=http://127.0.0.1:8900 ORS_API_KEY=loadtest
+
+Coordinates are derived from a hash of the query so the same location
+always geocodes to the same point inside the continental US.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def fake_coords(query):
+    digest = hashlib.sha256(query.strip().lower().encode('utf-8')).digest()
+    lat = 30 + digest[0] / 255 * 17     # 30N..47N
+    lon = -122 + digest[1] / 255 * 47   # 122W..75W
+    return lat, lon
+
+
+def haversine_meters(start, end):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*start, *end))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    # Set on the server by start_fake_upstreams()
+    latency_ms = 0
+    jitter_ms = 0
+    failure_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay_or_fail(self):
+        time.sleep(max(0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+        if random.random() < self.failure_rate:
+            self._send_json(503, {'error': 'Simulated upstream failure'})
+            return True
+        return False
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/search':
+            return self._send_json(404, {'error': 'Not found'})
+        if self._delay_or_fail():
+            return
+        query = parse_qs(url.query).get('q', [''])[0]
+        lat, lon = fake_coords(query)
+        self._send_json(200, [{'lat': str(lat), 'lon': str(lon), 'display_name': query, 'importance': 0.5}])
+
+    def do_POST(self):
+        if not urlparse(self.path).path.startswith('/v2/directions/'):
+            return self._send_json(404, {'error': 'Not found'})
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self._delay_or_fail():
+            return
+        (lon1, lat1), (lon2, lat2) = body['coordinates'][:2]
+        distance = haversine_meters((lat1, lon1), (lat2, lon2)) * 1.25  # Roads are longer than great circles
+        self._send_json(200, {'features': [{'properties': {'segments': [{'distance': distance, 'duration': distance / 24}]}}]})
+
+
+def start_fake_upstreams(host='127.0.0.1', port=8900, latency_ms=0, jitter_ms=0, failure_rate=0.0):
+    """Serve both fakes on one port from a background thread; returns the server."""
+    handler = type('ConfiguredHandler', (FakeUpstreamHandler,), {
+        'latency_ms': latency_ms, 'jitter_ms': jitter_ms, 'failure_rate': failure_rate,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_fake_upstreams(args.host, args.port, args.latency_ms, args.jitter_ms, args.failure_rate)
+    print(f"Fake Nominatim/ORS on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""Drive create/list/logs traffic with JWT-authenticated virtual users and report latency.
+
+Against an already running server (started with the fake upstream env vars):
+
+    python -m loadtest.run --url http://127.0.0.1:8000 --users 20 --duration 60
+
+Or let the harness start the fakes and one gunicorn per worker configuration
+(workers:worker-class:threads[:timeout[:max-requests]]) and compare them:
+
+    python -m loadtest.run --configs 3:sync:1 5:sync:1 3:gthread:4 --users 20
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+import requests
+from .fake_upstreams import start_fake_upstreams
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_TIMEOUT = 60  # Seconds to wait for a harness-started gunicorn to answer
+FULL_RUN_ENDPOINTS = ('register',)  # Happen during ramp-up, so reported over the whole run
+CITIES = ['Chicago, IL', 'Dallas, TX', 'Denver, CO', 'Atlanta, GA', 'Phoenix, AZ', 'Memphis, TN',
+          'Kansas City, MO', 'Nashville, TN', 'Columbus, OH', 'Salt Lake City, UT', 'Omaha, NE']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)  # endpoint -> [(started_at, latency_s, ok)]
+
+    def record(self, endpoint, started_at, latency, ok):
+        with self._lock:
+            self.samples[endpoint].append((started_at, latency, ok))
+
+    def report(self, run_start, steady_start, end):
+        """Per-endpoint stats for requests started in the steady-state window.
+
+        Registrations (FULL_RUN_ENDPOINTS) are counted over the whole run so
+        login failures during ramp-up still show up.
+        """
+        rows = {}
+        for endpoint, all_samples in sorted(self.samples.items()):
+            window_start = run_start if endpoint in FULL_RUN_ENDPOINTS else steady_start
+            elapsed = end - window_start
+            samples = [(latency, ok) for started_at, latency, ok in all_samples if started_at >= window_start]
+            if not samples:
+                continue
+            latencies = sorted(latency for latency, _ in samples)
+            errors = sum(1 for _, ok in samples if not ok)
+            rows[endpoint] = {
+                'requests': len(samples),
+                'errors': errors,
+                'error_rate': errors / len(samples),
+                'throughput_rps': len(samples) / elapsed,
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p95_ms': percentile(latencies, 95) * 1000,
+                'p99_ms': percentile(latencies, 99) * 1000,
+            }
+        return rows
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, base_url, stats, mix, deadline):
+        super().__init__(daemon=True)
+        self.api = base_url.rstrip('/') + '/api/'
+        self.stats = stats
+        self.mix = mix
+        self.deadline = deadline
+        self.session = requests.Session()
+        self.trip_ids = []
+        self.logged_in = False
+
+    def _call(self, endpoint, method, path, **kwargs):
+        started_at = time.monotonic()
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.api + path, timeout=180, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.stats.record(endpoint, started_at, time.perf_counter() - start, ok)
+        return response if ok else None
+
+    def login(self):
+        username = f"load-{uuid.uuid4().hex[:12]}"
+        response = self._call('register', 'POST', 'auth/register/', json={
+            'username': username, 'email': f"{username}@example.com", 'password': 'load-test-pass-1'
+        })
+        if response is None:
+            return False
+        self.session.headers['Authorization'] = f"Bearer {response.json()['token']}"
+        self.logged_in = True
+        return True
+
+    def create(self):
+        current, pickup, dropoff = random.sample(CITIES, 3)
+        response = self._call('create', 'POST', 'trips/', json={
+            'current_location': current, 'pickup_location': pickup,
+            'dropoff_location': dropoff, 'current_cycle_hours': random.randint(0, 20)
+        })
+        if response is not None:
+            self.trip_ids.append(response.json()['id'])
+
+    def list(self):
+        self._call('list', 'GET', 'trips/')
+
+    def logs(self):
+        if not self.trip_ids:
+            return self.create()
+        self._call('logs', 'GET', f"trips/{random.choice(self.trip_ids)}/logs/")
+
+    def run(self):
+        if not self.login():
+            return
+        actions, weights = zip(*self.mix.items())
+        while time.monotonic() < self.deadline:
+            getattr(self, random.choices(actions, weights)[0])()
+
+
+def run_load(base_url, users, duration, mix, ramp_up):
+    stats = Stats()
+    run_start = time.monotonic()
+    steady_start = run_start + ramp_up
+    deadline = steady_start + duration
+    threads = []
+    for _ in range(users):
+        thread = VirtualUser(base_url, stats, mix, deadline)
+        thread.start()
+        threads.append(thread)
+        time.sleep(ramp_up / max(users, 1))
+    for thread in threads:
+        thread.join()
+    if not any(thread.logged_in for thread in threads):
+        raise RuntimeError(
+            f"None of the {users} virtual users could register; check the server is up, "
+            "migrated and issuing JWTs"
+        )
+    # Other ramp-up traffic is left out of the figures
+    return stats.report(run_start, steady_start, time.monotonic())
+
+
+def start_gunicorn(config, port, upstream_port, db_env):
+    """Start gunicorn for one `workers:class:threads[:timeout[:max_requests]]` config."""
+    parts = config.split(':')
+    workers, worker_class, threads = parts[0], parts[1], parts[2]
+    timeout = parts[3] if len(parts) > 3 else '120'
+    max_requests = parts[4] if len(parts) > 4 else '1000'
+    env = {
+        **os.environ,
+        **db_env,
+        'NOMINATIM_DOMAIN': f'127.0.0.1:{upstream_port}',
+        'NOMINATIM_SCHEME': 'http',
+        'ORS_BASE_URL': f'http://127.0.0.1:{upstream_port}',
+        'ORS_API_KEY': 'loadtest',
+        'DEBUG': '0',
+    }
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', 'backend.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', workers, '--worker-class', worker_class,
+        '--threads', threads, '--timeout', timeout, '--max-requests', max_requests,
+        '--max-requests-jitter', '100', '--log-level', 'warning',
+    ], cwd=BACKEND_DIR, env=env)
+
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    try:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                break
+            try:
+                # The first request to a cold worker imports views and matplotlib
+                requests.get(url + '/api/trips/', timeout=10)
+                return process, url
+            except requests.RequestException:
+                time.sleep(0.5)
+        raise RuntimeError(f"gunicorn did not start for config {config}")
+    except BaseException:
+        process.terminate()
+        process.wait()
+        raise
+
+
+def print_report(label, rows):
+    print(f"\n== {label} ==")
+    print(f"{'endpoint':<10} {'reqs':>7} {'err%':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, row in rows.items():
+        print(f"{endpoint:<10} {row['requests']:>7} {row['error_rate'] * 100:>5.1f}% {row['throughput_rps']:>8.2f} "
+              f"{row['p50_ms']:>9.0f} {row['p95_ms']:>9.0f} {row['p99_ms']:>9.0f}")
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, weight = item.split('=')
+        if name not in ('create', 'list', 'logs'):
+            raise argparse.ArgumentTypeError(f"Unknown action: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="Base URL of a running server (skips --configs)")
+    parser.add_argument('--configs', nargs='+', default=['3:sync:1:120:1000'],
+                        help="gunicorn configs to start and compare: workers:class:threads[:timeout[:max_requests]]")
+    parser.add_argument('--port', type=int, default=8800, help="Port for harness-started gunicorn")
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=60, help="Seconds of steady load after ramp-up")
+    parser.add_argument('--ramp-up', type=float, default=5)
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('create=1,list=3,logs=2'))
+    parser.add_argument('--upstream-port', type=int, default=8900)
+    parser.add_argument('--upstream-latency-ms', type=float, default=200)
+    parser.add_argument('--upstream-jitter-ms', type=float, default=50)
+    parser.add_argument('--upstream-failure-rate', type=float, default=0.0)
+    parser.add_argument('--db-name', help="Dedicated PostgreSQL database for harness-started servers "
+                                          "(required with DB_ENGINE=postgresql)")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    if args.url:
+        results[args.url] = run_load(args.url, args.users, args.duration, args.mix, args.ramp_up)
+        print_report(args.url, results[args.url])
+    else:
+        # Harness-started servers never touch the developer's database: SQLite
+        # goes to a temp file, PostgreSQL to an explicitly named database
+        db_dir = None
+        if os.getenv('DB_ENGINE', 'sqlite') == 'postgresql':
+            if not args.db_name:
+                parser.error("--db-name is required with DB_ENGINE=postgresql; "
+                             "load users and trips are written to it")
+            db_env = {'DB_NAME': args.db_name}
+        else:
+            db_dir = tempfile.mkdtemp(prefix='loadtest-')
+            db_env = {'SQLITE_PATH': os.path.join(db_dir, 'db.sqlite3')}
+
+        upstreams = start_fake_upstreams(port=args.upstream_port, latency_ms=args.upstream_latency_ms,
+                                         jitter_ms=args.upstream_jitter_ms,
+                                         failure_rate=args.upstream_failure_rate)
+        try:
+            subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput', '-v', '0'],
+                           cwd=BACKEND_DIR, env={**os.environ, **db_env}, check=True)
+            for config in args.configs:
+                process, url = start_gunicorn(config, args.port, args.upstream_port, db_env)
+                try:
+                    results[config] = run_load(url, args.users, args.duration, args.mix, args.ramp_up)
+                finally:
+                    process.terminate()
+                    process.wait()
+                print_report(f"gunicorn {config}", results[config])
+        finally:
+            upstreams.shutdown()
+            if db_dir:
+                shutil.rmtree(db_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
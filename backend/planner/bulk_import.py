@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from geopy.extra.rate_limiter import RateLimiter
+from django.contrib.auth.models import User
+from django.db import transaction
+from .models import Trip, DailyLog
+from .serializers import TripCreateSerializer
+from .hos_logic import (
+    geocode_location, get_route_distance, simulate_hos_trip, LOCATION_FIELDS
+)
+from .geo import route_fields, stored_stops
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_MAX_ROWS = 500
+# New locations geocoded per request: lookups run at Nominatim's 1 request/s,
+# so this keeps a batch well inside gunicorn's 120s worker timeout (start.sh)
+IMPORT_GEOCODE_BUDGET = 90
+IMPORT_CHUNK_SIZE = 200  # Trips written per transaction
+GEOCODE_MIN_DELAY = 1.0
+ROUTE_WORKERS = 8
+
+
+def parse_import_rows(content, input_format):
+    """Parse CSV (with a header row) or NDJSON text into a list of dicts.
+
+    Unparseable NDJSON lines are kept as `None` so they are reported
+    against their line number instead of aborting the batch.
+    """
+    if input_format == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    rows = []
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        rows.append(row if isinstance(row, dict) else None)
+    return rows
+
+
+def _location_key(name):
+    return ' '.join(name.split()).casefold()
+
+
+def _known_locations(user):
+    """Coordinates already stored on the user's earlier trips, keyed by `_location_key`."""
+    known = {}
+    trips = Trip.objects.filter(user=user, route__isnull=False).only(*LOCATION_FIELDS, 'route')
+    for trip in trips.iterator(chunk_size=500):
+        for field, stop in zip(LOCATION_FIELDS, stored_stops(trip)):
+            known.setdefault(_location_key(getattr(trip, field)), tuple(stop))
+    return known
+
+
+def _geocode_unique(names):
+    """Geocode each distinct location once, at most one request per second.
+
+    Nominatim's usage policy allows one request per second, so lookups are
+    throttled rather than concurrent; the saving comes from never asking for
+    the same place twice.
+    """
+    geocode = RateLimiter(geocode_location, min_delay_seconds=GEOCODE_MIN_DELAY, max_retries=0)
+    coords = {}
+    for name in names:
+        key = _location_key(name)
+        if key not in coords:
+            coords[key] = geocode(name)
+    return coords
+
+
+def _route_unique(legs):
+    """Fetch each distinct (start, end) leg once, concurrently."""
+    unique_legs = list(dict.fromkeys(legs))
+    with ThreadPoolExecutor(max_workers=ROUTE_WORKERS) as pool:
+        distances = pool.map(lambda leg: get_route_distance(*leg), unique_legs)
+        return dict(zip(unique_legs, distances))
+
+
+def _write_chunk(planned):
+    """Insert one chunk of planned trips and their logs in a single transaction."""
+    with transaction.atomic():
+        trips = Trip.objects.bulk_create([p['trip'] for p in planned])
+        daily_logs = []
+        for trip, p in zip(trips, planned):
+            for log in p['logs']:
+                log.trip = trip
+                daily_logs.append(log)
+        DailyLog.objects.bulk_create(daily_logs)
+    return trips
+
+
+def import_trips(user: User, rows):
+    """Plan and save a batch of trips, reporting per-row errors.
+
+    Log images are not drawn here: DailyLogs are saved with their statuses
+    and an empty `log_image`, which every read path renders before returning
+    it (see `ensure_log_images`), or `manage.py render_log_images` ahead of
+    time. Rows are numbered from 1. Returns
+    {'created': [...], 'errors': [...]}.
+    """
+    if len(rows) > IMPORT_MAX_ROWS:
+        raise ValueError(f"Import is limited to {IMPORT_MAX_ROWS} rows per request")
+
+    errors = []
+    valid = []
+    for row_number, row in enumerate(rows, start=1):
+        if row is None:
+            errors.append({'row': row_number, 'errors': {'non_field_errors': ['Invalid JSON object']}})
+            continue
+        serializer = TripCreateSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((row_number, serializer.validated_data))
+        else:
+            errors.append({'row': row_number, 'errors': serializer.errors})
+
+    # Reuse stored coordinates, then geocode each new location once. Rows are
+    # admitted in order while their new locations fit the geocoding budget;
+    # the rest are reported so they can be resubmitted.
+    coords = _known_locations(user)
+    to_geocode = {}
+    admitted = []
+    for row_number, data in valid:
+        new = {_location_key(data[field]): data[field] for field in LOCATION_FIELDS}
+        new = {key: name for key, name in new.items() if key not in coords and key not in to_geocode}
+        if len(to_geocode) + len(new) > IMPORT_GEOCODE_BUDGET:
+            errors.append({'row': row_number, 'errors': {'non_field_errors': [
+                f"Location budget exceeded ({IMPORT_GEOCODE_BUDGET} new locations per request); resubmit this row"
+            ]}})
+            continue
+        to_geocode.update(new)
+        admitted.append((row_number, data))
+    coords.update(_geocode_unique(to_geocode.values()))
+
+    routable = []
+    for row_number, data in admitted:
+        stops = [coords[_location_key(data[field])]
+                 for field in LOCATION_FIELDS]
+        if not all(stops):
+            errors.append({'row': row_number, 'errors': {'non_field_errors': ['Geocoding failed for one or more locations']}})
+            continue
+        routable.append((row_number, data, stops))
+
+    distances = _route_unique(
+        leg for _, _, (current, pickup, dropoff) in routable
+        for leg in ((current, pickup), (pickup, dropoff))
+    )
+
+    created = []
+    planned = []
+    for row_number, data, (current, pickup, dropoff) in routable:
+        distance_to_pickup = distances[(current, pickup)]
+        distance_pickup_to_dropoff = distances[(pickup, dropoff)]
+        try:
+            daily_logs_data, total_time = simulate_hos_trip(
+                distance_to_pickup, distance_pickup_to_dropoff, data['current_cycle_hours']
+            )
+        except ValueError as e:
+            errors.append({'row': row_number, 'errors': {'non_field_errors': [str(e)]}})
+            continue
+
+        trip = Trip(
+            user=user,
+            current_location=data['current_location'],
+            pickup_location=data['pickup_location'],
+            dropoff_location=data['dropoff_location'],
+            current_cycle_hours=data['current_cycle_hours'],
+            total_distance=distance_to_pickup + distance_pickup_to_dropoff,
+            distance_to_pickup=distance_to_pickup,
+            distance_pickup_to_dropoff=distance_pickup_to_dropoff,
+            **route_fields([current, pickup, dropoff], [log['statuses'] for log in daily_logs_data])
+        )
+        logs = [
+            DailyLog(
+                log_date=log['date'],
+                log_image='',  # Rendered by ensure_log_images
+                miles_driven=log['miles'],
+                statuses=log['statuses'],
+                sim_state=log['state']
+            )
+            for log in daily_logs_data
+        ]
+        planned.append({'row': row_number, 'trip': trip, 'logs': logs, 'total_time_hours': total_time})
+
+        if len(planned) >= IMPORT_CHUNK_SIZE:
+            created.extend(_summarise(planned, _write_chunk(planned)))
+            planned = []
+    if planned:
+        created.extend(_summarise(planned, _write_chunk(planned)))
+
+    errors.sort(key=lambda e: e['row'])
+    return {'created': created, 'errors': errors}
+
+
+def _summarise(planned, trips):
+    return [
+        {
+            'row': p['row'],
+            'trip_id': trip.id,
+            'total_distance': trip.total_distance,
+            'total_time_hours': p['total_time_hours'],
+            'estimated_days': len(p['logs'])
+        }
+        for trip, p in zip(trips, planned)
+    ]
@@ -0,0 +1,132 @@
+import base64
+import csv
+import json
+import zipfile
+from .models import Trip, DailyLog
+from .hos_logic import ensure_log_images, get_driver_name
+
+EXPORT_CHUNK_SIZE = 2000
+METADATA_FORMATS = ('ndjson', 'csv')
+# ZIP exports over the API must finish inside the gunicorn timeout (120 s by
+# default); anything larger goes through `manage.py export_trips`
+API_EXPORT_MAX_IMAGES = 1000
+API_EXPORT_MAX_PENDING_IMAGES = 20  # Each still has to be drawn with matplotlib
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'zip': 'application/zip',
+}
+
+TRIP_FIELDS = ['id', 'user_id', 'current_location', 'pickup_location', 'dropoff_location',
+               'current_cycle_hours', 'total_distance', 'created_at']
+LOG_FIELDS = ['id', 'trip_id', 'log_date', 'miles_driven']
+# Model field names for .only(); the FK columns above are read via their attnames
+TRIP_ONLY = ['id', 'user', 'current_location', 'pickup_location', 'dropoff_location',
+             'current_cycle_hours', 'total_distance', 'created_at']
+LOG_ONLY = ['id', 'trip', 'log_date', 'miles_driven', 'statuses']
+CSV_HEADER = ['trip_' + f if f != 'user_id' else f for f in TRIP_FIELDS] + ['log_' + f for f in LOG_FIELDS if f != 'trip_id']
+
+
+class _ChunkBuffer:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _json_line(record):
+    return json.dumps(record, default=str) + '\n'
+
+
+def _export_logs(trips):
+    """Logs for the given trips without the base64 image column."""
+    return (DailyLog.objects.filter(trip__in=trips)
+            .select_related('trip')
+            .only(*LOG_ONLY, *('trip__' + f for f in TRIP_ONLY))
+            .order_by('trip_id', 'log_date', 'id'))
+
+
+def iter_ndjson(trips, chunk_size=EXPORT_CHUNK_SIZE):
+    """One JSON object per line: every trip, then every log (tagged by `type`)."""
+    for trip in trips.only(*TRIP_ONLY).order_by('id').iterator(chunk_size=chunk_size):
+        record = {f: getattr(trip, f) for f in TRIP_FIELDS}
+        yield _json_line({'type': 'trip', **record})
+    for log in _export_logs(trips).iterator(chunk_size=chunk_size):
+        record = {f: getattr(log, f) for f in LOG_FIELDS}
+        yield _json_line({'type': 'log', **record, 'statuses': log.statuses})
+
+
+def iter_csv(trips, chunk_size=EXPORT_CHUNK_SIZE):
+    """One row per daily log, denormalised with its trip's columns."""
+    buf = _ChunkBuffer()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_HEADER)
+    yield buf.drain()
+    for log in _export_logs(trips).iterator(chunk_size=chunk_size):
+        writer.writerow([getattr(log.trip, f) for f in TRIP_FIELDS]
+                        + [getattr(log, f) for f in LOG_FIELDS if f != 'trip_id'])
+        yield buf.drain()
+
+
+def iter_zip(trips, metadata_format='ndjson', chunk_size=EXPORT_CHUNK_SIZE):
+    """ZIP with the metadata file plus every log image as `images/trip-<id>/<date>-<log id>.png`.
+
+    zipfile falls back to data descriptors on an unseekable output, so each
+    member is compressed and yielded as it is written. Logs still waiting for
+    their image (bulk imports) are rendered and saved on the way through.
+    """
+    buf = _ChunkBuffer()
+    rows = iter_ndjson(trips, chunk_size) if metadata_format == 'ndjson' else iter_csv(trips, chunk_size)
+    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(f'metadata.{metadata_format}', 'w') as member:
+            for row in rows:
+                member.write(row if isinstance(row, bytes) else row.encode('utf-8'))
+                yield buf.drain()
+
+        images = (DailyLog.objects.filter(trip__in=trips)
+                  .select_related('trip__user')
+                  .only('id', 'trip', 'log_date', 'log_image', 'miles_driven', 'statuses',
+                        'trip__user__username', 'trip__user__first_name', 'trip__user__last_name')
+                  .order_by('trip_id', 'log_date', 'id'))
+        for log in images.iterator(chunk_size=max(1, chunk_size // 100)):  # Images are ~100x a metadata row
+            if not log.log_image:
+                ensure_log_images([log], driver_name=get_driver_name(log.trip.user))
+            name = f'images/trip-{log.trip_id}/{log.log_date}-{log.id}.png'
+            # PNG is already compressed
+            with archive.open(zipfile.ZipInfo(name), 'w') as member:
+                member.write(base64.b64decode(log.log_image))
+            yield buf.drain()
+    yield buf.drain()
+
+
+def iter_export(trips, metadata_format='ndjson', images=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Pick the export generator; returns (chunks, content type, file extension)."""
+    if metadata_format not in METADATA_FORMATS:
+        raise ValueError(f"Unsupported export format: {metadata_format}")
+    if images:
+        return iter_zip(trips, metadata_format, chunk_size), CONTENT_TYPES['zip'], 'zip'
+    if metadata_format == 'csv':
+        return iter_csv(trips, chunk_size), CONTENT_TYPES['csv'], 'csv'
+    return iter_ndjson(trips, chunk_size), CONTENT_TYPES['ndjson'], 'ndjson'
+
+
+def export_queryset(user=None):
+    """Trips to export: one user's, or the whole fleet when no user is given."""
+    trips = Trip.objects.all()
+    if user is not None:
+        trips = trips.filter(user=user)
+    return trips
@@ -0,0 +1,86 @@
+import math
+from django.db.models import Q
+from geopy.distance import geodesic
+
+MILES_PER_DEGREE_LAT = 69.0
+COORD_PRECISION = 6   # ~0.1 m
+HOURS_PRECISION = 4   # < 1 s
+
+
+def route_fields(stops, day_statuses):
+    """Trip field values for the stored route of a planned trip.
+
+    `stops` are (lat, lon) for the current, pickup and dropoff locations and
+    `day_statuses` holds each day's (start_hr, duration, line_id, remark)
+    list. Segments are stored column-wise so keys and remark strings are
+    written once per trip, not once per segment.
+    """
+    lats = [round(lat, COORD_PRECISION) for lat, _ in stops]
+    lons = [round(lon, COORD_PRECISION) for _, lon in stops]
+
+    remarks = []
+    segments = {'day': [], 'start': [], 'duration': [], 'status': [], 'remark': []}
+    for day, statuses in enumerate(day_statuses):
+        for start_hr, duration, line_id, remark in statuses:
+            if remark not in remarks:
+                remarks.append(remark)
+            segments['day'].append(day)
+            segments['start'].append(round(start_hr, HOURS_PRECISION))
+            segments['duration'].append(round(duration, HOURS_PRECISION))
+            segments['status'].append(line_id)
+            segments['remark'].append(remarks.index(remark))
+
+    return {
+        'route': {'stops': {'lat': lats, 'lon': lons}, 'segments': segments, 'remarks': remarks},
+        'min_lat': min(lats),
+        'max_lat': max(lats),
+        'min_lon': min(lons),
+        'max_lon': max(lons),
+    }
+
+
+def stored_stops(trip):
+    """(lat, lon) of each stop from the trip's stored route, or None if it has none."""
+    if not trip.route:
+        return None
+    stops = trip.route['stops']
+    return list(zip(stops['lat'], stops['lon']))
+
+
+def _longitude_overlap(west, east):
+    """Filter for trip boxes overlapping [west, east], wrapping at the antimeridian.
+
+    A search window that runs past +/-180 is split into its two halves. Trip
+    boxes are plain min/max of the stop longitudes, so a trip that crosses
+    the antimeridian gets a box spanning the globe and is never missed here.
+    """
+    if east - west >= 360:
+        return Q()
+    if west < -180:
+        return Q(min_lon__lte=east) | Q(max_lon__gte=west + 360)
+    if east > 180:
+        return Q(max_lon__gte=west) | Q(min_lon__lte=east - 360)
+    return Q(min_lon__lte=east, max_lon__gte=west)
+
+
+def trips_near(queryset, lat, lon, radius_miles):
+    """Trips with a stop within `radius_miles` of (lat, lon), nearest first.
+
+    The bounding-box columns narrow the search in the database using their
+    indexes; the exact distance is then checked against the stored stops.
+    Returns a list of (trip, distance in miles).
+    """
+    dlat = radius_miles / MILES_PER_DEGREE_LAT
+    dlon = radius_miles / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    candidates = queryset.filter(
+        _longitude_overlap(lon - dlon, lon + dlon),
+        min_lat__lte=lat + dlat, max_lat__gte=lat - dlat,
+    )
+
+    results = []
+    for trip in candidates:
+        distance = min(geodesic((lat, lon), stop).miles for stop in stored_stops(trip))
+        if distance <= radius_miles:
+            results.append((trip, distance))
+    results.sort(key=lambda result: result[1])
+    return results
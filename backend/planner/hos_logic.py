@@ -2,6 +2,7 @@ import os
 import requests
 import base64
 from datetime import datetime, timedelta
+from itertools import zip_longest
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
 from io import BytesIO
@@ -9,13 +10,21 @@ import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
 from .models import Trip, DailyLog
+from .geo import route_fields, stored_stops
 from django.contrib.auth.models import User
+from django.db import transaction
 
 ORS_API_KEY = os.getenv('ORS_API_KEY', '')
+ORS_BASE_URL = os.getenv('ORS_BASE_URL', 'https://api.openrouteservice.org')
+NOMINATIM_DOMAIN = os.getenv('NOMINATIM_DOMAIN', 'nominatim.openstreetmap.org')
+NOMINATIM_SCHEME = os.getenv('NOMINATIM_SCHEME', 'https')
+SIM_START_TIME = datetime(2025, 11, 17, 6, 30)  # 6:30 AM start (per Schneider example)
+LOCATION_FIELDS = ('current_location', 'pickup_location', 'dropoff_location')
 
 def geocode_location(location_name):
     """Convert location name to coordinates."""
-    geolocator = Nominatim(user_agent="truck_trip_planner", timeout=10)
+    geolocator = Nominatim(user_agent="truck_trip_planner", timeout=10,
+                           domain=NOMINATIM_DOMAIN, scheme=NOMINATIM_SCHEME)
     try:
         location = geolocator.geocode(location_name, timeout=10)
         if location:
@@ -28,7 +37,7 @@ def get_route_distance(start_coords, end_coords):
     """Get route distance using ORS (truck profile) or fallback to geodesic."""
     if ORS_API_KEY and ORS_API_KEY != 'your_ors_key_here':
         try:
-            url = "https://api.openrouteservice.org/v2/directions/driving-hgv"  # Heavy Goods Vehicle
+            url = f"{ORS_BASE_URL}/v2/directions/driving-hgv"  # Heavy Goods Vehicle
             headers = {'Authorization': f'Bearer {ORS_API_KEY}', 'Content-Type': 'application/json'}
             body = {
                 "coordinates": [[start_coords[1], start_coords[0]], [end_coords[1], end_coords[0]]]
@@ -44,32 +53,61 @@ def get_route_distance(start_coords, end_coords):
     # Fallback
     return geodesic(start_coords, end_coords).miles
 
-def simulate_hos_trip(distance_to_pickup, distance_pickup_to_dropoff, current_cycle_hours):
-    """Simulate trip with optimized HOS rules, including sleeper berth splits for minimal downtime."""
+def checkpoint_is_valid(state, segment_distances):
+    """Whether a day-boundary state from `simulate_hos_trip` is still reachable with new leg distances.
+
+    Legs finished before the checkpoint must be unchanged and the current leg
+    must still have miles left; every earlier chunk of it was then a full
+    55-mile hour under both the old and new distances.
+    """
+    completed = state['completed_segments']
+    if any(abs(old - new) > 1e-6 for old, new in zip(completed, segment_distances)):
+        return False
+    return segment_distances[state['seg_idx']] - state['seg_miles'] > 0
+
+def simulate_hos_trip(distance_to_pickup, distance_pickup_to_dropoff, current_cycle_hours, resume_state=None):
+    """Simulate trip with optimized HOS rules, including sleeper berth splits for minimal downtime.
+
+    Each day's entry carries the simulation `state` at its start (None for the
+    first day). Passing one of those as `resume_state` continues from that
+    day boundary and only returns the days from there on.
+    """
     total_distance = distance_to_pickup + distance_pickup_to_dropoff
     if total_distance > 4000:  # Rough check for feasibility
         raise ValueError("Trip too long for 70hr cycle")
     
-    start_time = datetime(2025, 11, 17, 6, 30)  # 6:30 AM start (per Schneider example)
-    current_time = start_time
-    cycle_hours = current_cycle_hours
+    start_time = SIM_START_TIME
     daily_logs_data = []
-    fuel_miles = 0
-    drive_since_break = 0
-    current_day = start_time.date()
     day_statuses = []  # List of (start_hr, duration, line_id 1-4, remark)
     day_miles = 0
-    locations = ['Start']  # Placeholder for remarks
+    segment_distances = [distance_to_pickup, distance_pickup_to_dropoff]
 
-    # Pre-trip inspection: 0.5hr on-duty (Line 4)
-    day_statuses.append((current_time.hour + current_time.minute/60, 0.5, 4, "Pre-trip inspection"))
-    current_time += timedelta(hours=0.5)
-    cycle_hours += 0.5
+    if resume_state is None:
+        current_time = start_time
+        cycle_hours = current_cycle_hours
+        fuel_miles = 0
+        drive_since_break = 0
+        start_seg, start_seg_miles = 0, 0
+        locations = ['Start']  # Placeholder for remarks
+
+        # Pre-trip inspection: 0.5hr on-duty (Line 4)
+        day_statuses.append((current_time.hour + current_time.minute/60, 0.5, 4, "Pre-trip inspection"))
+        current_time += timedelta(hours=0.5)
+        cycle_hours += 0.5
+    else:
+        current_time = datetime.fromisoformat(resume_state['time'])
+        cycle_hours = current_cycle_hours + resume_state['on_duty_hours']
+        fuel_miles = resume_state['fuel_miles']
+        drive_since_break = resume_state['drive_since_break']
+        start_seg, start_seg_miles = resume_state['seg_idx'], resume_state['seg_miles']
+        locations = []
+    current_day = current_time.date()
+    day_state = resume_state
 
     # Drive to pickup
-    segment_distances = [distance_to_pickup, distance_pickup_to_dropoff]
-    for seg_idx, seg_dist in enumerate(segment_distances):
-        remaining_dist = seg_dist
+    for seg_idx in range(start_seg, len(segment_distances)):
+        seg_dist = segment_distances[seg_idx]
+        remaining_dist = seg_dist - (start_seg_miles if seg_idx == start_seg else 0)
         while remaining_dist > 0:
             if current_time.date() != current_day:
                 # End day, generate log
@@ -77,12 +115,22 @@ def simulate_hos_trip(distance_to_pickup, distance_pickup_to_dropoff, current_cy
                     'date': current_day,
                     'statuses': day_statuses,
                     'miles': day_miles,
-                    'locations': locations
+                    'locations': locations,
+                    'state': day_state
                 })
                 current_day = current_time.date()
                 day_statuses = []
                 day_miles = 0
                 locations = []
+                day_state = {
+                    'time': current_time.isoformat(),
+                    'on_duty_hours': cycle_hours - current_cycle_hours,
+                    'fuel_miles': fuel_miles,
+                    'drive_since_break': drive_since_break,
+                    'seg_idx': seg_idx,
+                    'seg_miles': seg_dist - remaining_dist,
+                    'completed_segments': segment_distances[:seg_idx]
+                }
 
             # Check limits
             on_duty_today = sum(dur for _, dur, lid, _ in day_statuses if lid in [3,4])  # Driving + on-duty
@@ -150,7 +198,8 @@ def simulate_hos_trip(distance_to_pickup, distance_pickup_to_dropoff, current_cy
         'date': current_day,
         'statuses': day_statuses,
         'miles': day_miles,
-        'locations': locations
+        'locations': locations,
+        'state': day_state
     })
 
     if cycle_hours > 70:
@@ -245,6 +294,28 @@ def generate_log_sheet_image(log_data, driver_name="Driver"):
     plt.close(fig)
     buf.seek(0)
     return base64.b64encode(buf.read()).decode('utf-8')
+
+def get_driver_name(user: User):
+    """Use full name if available, else username."""
+    driver_name = user.get_full_name().strip()
+    if not driver_name:
+        driver_name = user.username.upper()
+    return driver_name
+
+def ensure_log_images(logs, driver_name="Driver"):
+    """Render and save the image of any log stored without one (e.g. from a bulk import).
+
+    Every read path that returns or exports images calls this, so a log's
+    image never depends on whether someone has opened the trip before.
+    """
+    for log in logs:
+        if not log.log_image and log.statuses:
+            log.log_image = generate_log_sheet_image(
+                {'date': log.log_date, 'statuses': log.statuses, 'miles': log.miles_driven},
+                driver_name=driver_name
+            )
+            log.save(update_fields=['log_image'])
+
 def plan_trip_and_save(user: User, data):
     """Main function: Simulate, generate logs, save to DB."""
     current_location = data['current_location']
@@ -275,24 +346,26 @@ def plan_trip_and_save(user: User, data):
         pickup_location=pickup_location,
         dropoff_location=dropoff_location,
         current_cycle_hours=current_cycle_hours,
-        total_distance=total_distance
+        total_distance=total_distance,
+        distance_to_pickup=distance_to_pickup,
+        distance_pickup_to_dropoff=distance_pickup_to_dropoff,
+        **route_fields([current_coords, pickup_coords, dropoff_coords],
+                       [log['statuses'] for log in daily_logs_data])
     )
 
     # Generate & save logs
     logs = []
+    driver_name = get_driver_name(user)
     for log in daily_logs_data:
-        # Use full name if available, else username
-        driver_name = user.get_full_name().strip()
-        if not driver_name:
-            driver_name = user.username.upper()
-
         image_b64 = generate_log_sheet_image(log, driver_name=driver_name)
 
         daily_log = DailyLog.objects.create(
             trip=trip,
             log_date=log['date'],
             log_image=image_b64,
-            miles_driven=log['miles']
+            miles_driven=log['miles'],
+            statuses=log['statuses'],
+            sim_state=log['state']
         )
         logs.append({
             'id': daily_log.id,
@@ -307,4 +380,105 @@ def plan_trip_and_save(user: User, data):
         'total_time_hours': total_time,
         'estimated_days': len(logs),
         'daily_logs': logs
-    }
\ No newline at end of file
+    }
+
+def _same_log(daily_log, log):
+    """Whether a stored DailyLog already shows a freshly simulated day."""
+    def normalise(statuses):
+        return [(round(start, 6), round(dur, 6), lid, remark) for start, dur, lid, remark in statuses]
+    return (daily_log.log_date == log['date']
+            and abs(daily_log.miles_driven - log['miles']) < 1e-6
+            and normalise(daily_log.statuses) == normalise(log['statuses']))
+
+def replan_trip_and_save(trip: Trip, data):
+    """Apply edits to a trip and re-simulate from the last day boundary that is still valid.
+
+    Stops that did not change come from the stored route, only legs whose
+    endpoints changed are routed again, and only DailyLog rows whose statuses
+    or miles changed are re-rendered; the other pages keep their stored images.
+    """
+    locations = {field: data.get(field, getattr(trip, field)) for field in LOCATION_FIELDS}
+    current_cycle_hours = float(data.get('current_cycle_hours', trip.current_cycle_hours))
+    changed = {field for field in LOCATION_FIELDS if locations[field] != getattr(trip, field)}
+
+    # Legs: (start field, end field, stored distance)
+    legs = [
+        ('current_location', 'pickup_location', trip.distance_to_pickup),
+        ('pickup_location', 'dropoff_location', trip.distance_pickup_to_dropoff),
+    ]
+    stale = [distance is None or {start, end} & changed for start, end, distance in legs]
+    stops = dict(zip(LOCATION_FIELDS, stored_stops(trip) or []))
+    coords = {
+        field: stops[field] if field in stops and field not in changed else geocode_location(locations[field])
+        for field in LOCATION_FIELDS
+    }
+    if not all(coords.values()):
+        raise ValueError("Geocoding failed for one or more locations")
+    segment_distances = [
+        get_route_distance(coords[start], coords[end]) if is_stale else distance
+        for (start, end, distance), is_stale in zip(legs, stale)
+    ]
+
+    # Resume from the latest day whose starting state is still reachable
+    existing = list(trip.logs.defer('log_image').order_by('log_date'))
+    resume_from = 0
+    for k in range(len(existing) - 1, 0, -1):
+        state = existing[k].sim_state
+        if state and checkpoint_is_valid(state, segment_distances):
+            resume_from = k
+            break
+    resume_state = existing[resume_from].sim_state if resume_from else None
+    daily_logs_data, total_time = simulate_hos_trip(*segment_distances, current_cycle_hours, resume_state=resume_state)
+
+    driver_name = get_driver_name(trip.user)
+    updated_days = []
+    with transaction.atomic():
+        for field, value in locations.items():
+            setattr(trip, field, value)
+        trip.current_cycle_hours = current_cycle_hours
+        trip.distance_to_pickup, trip.distance_pickup_to_dropoff = segment_distances
+        trip.total_distance = sum(segment_distances)
+        day_statuses = [log.statuses for log in existing[:resume_from]] + [log['statuses'] for log in daily_logs_data]
+        for field, value in route_fields([coords[field] for field in LOCATION_FIELDS], day_statuses).items():
+            setattr(trip, field, value)
+        trip.save()
+
+        removed = []
+        for daily_log, log in zip_longest(existing[resume_from:], daily_logs_data):
+            if log is None:
+                removed.append(daily_log.id)
+                continue
+            if daily_log is not None and _same_log(daily_log, log):
+                if daily_log.sim_state != log['state']:
+                    daily_log.sim_state = log['state']
+                    daily_log.save(update_fields=['sim_state'])
+                continue
+
+            image_b64 = generate_log_sheet_image(log, driver_name=driver_name)
+            if daily_log is None:
+                DailyLog.objects.create(
+                    trip=trip,
+                    log_date=log['date'],
+                    log_image=image_b64,
+                    miles_driven=log['miles'],
+                    statuses=log['statuses'],
+                    sim_state=log['state']
+                )
+            else:
+                daily_log.log_date = log['date']
+                daily_log.log_image = image_b64
+                daily_log.miles_driven = log['miles']
+                daily_log.statuses = log['statuses']
+                daily_log.sim_state = log['state']
+                daily_log.save(update_fields=['log_date', 'log_image', 'miles_driven', 'statuses', 'sim_state'])
+            updated_days.append(str(log['date']))
+        if removed:
+            DailyLog.objects.filter(id__in=removed).delete()
+
+    return {
+        'trip_id': trip.id,
+        'total_distance': trip.total_distance,
+        'total_time_hours': total_time,
+        'estimated_days': resume_from + len(daily_logs_data),
+        'updated_days': updated_days
+    }
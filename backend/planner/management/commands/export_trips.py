@@ -0,0 +1,59 @@
+import argparse
+import io
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from planner.export import EXPORT_CHUNK_SIZE, METADATA_FORMATS, export_queryset, iter_export
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+class Command(BaseCommand):
+    help = "Stream trip and daily log history to NDJSON/CSV, or a ZIP that also holds the log images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to export (default: every user)")
+        parser.add_argument('--format', choices=METADATA_FORMATS, default='ndjson', dest='metadata_format')
+        parser.add_argument('--images', action='store_true', help="Write a ZIP including every log image")
+        parser.add_argument('--chunk-size', type=positive_int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument('--output', '-o', help="File to write, or - for stdout (default: stdout)")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        chunks, _, _ = iter_export(
+            export_queryset(user),
+            metadata_format=options['metadata_format'],
+            images=options['images'],
+            chunk_size=options['chunk_size']
+        )
+
+        if options['output'] and options['output'] != '-':
+            with open(options['output'], 'wb') as out:
+                for chunk in chunks:
+                    out.write(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+            return
+
+        # Go through self.stdout's stream so call_command(stdout=...) captures the export
+        stream = self.stdout._out
+        if not isinstance(stream, io.TextIOBase):
+            binary = stream
+        else:
+            binary = getattr(stream, 'buffer', None)
+            if binary is None and options['images']:
+                raise CommandError("A ZIP export needs a binary stream; pass --output")
+        for chunk in chunks:
+            if binary is not None:
+                binary.write(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+            else:
+                stream.write(chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk)
+        (binary or stream).flush()
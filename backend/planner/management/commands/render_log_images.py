@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from planner.hos_logic import ensure_log_images, get_driver_name
+from planner.models import DailyLog
+
+
+class Command(BaseCommand):
+    help = "Render the images of daily logs saved without one (e.g. after a bulk import)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only this username's trips (default: every user)")
+
+    def handle(self, *args, **options):
+        pending = DailyLog.objects.filter(log_image='').select_related('trip__user').order_by('trip_id', 'log_date')
+        if options['user']:
+            pending = pending.filter(trip__user__username=options['user'])
+
+        rendered = 0
+        for log in pending.iterator(chunk_size=50):
+            ensure_log_images([log], driver_name=get_driver_name(log.trip.user))
+            rendered += 1
+        self.stdout.write(f"Rendered {rendered} log image(s)")
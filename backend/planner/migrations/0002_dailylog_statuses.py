@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailylog',
+            name='statuses',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
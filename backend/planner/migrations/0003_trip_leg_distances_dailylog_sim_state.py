@@ -0,0 +1,28 @@
+# Generated by Django 4.2.26 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0002_dailylog_statuses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='distance_to_pickup',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='distance_pickup_to_dropoff',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dailylog',
+            name='sim_state',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
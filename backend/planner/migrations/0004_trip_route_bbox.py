@@ -0,0 +1,54 @@
+# Generated by Django 4.2.26 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0003_trip_leg_distances_dailylog_sim_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='route',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='min_lat',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='max_lat',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='min_lon',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='max_lon',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['min_lat'], name='trip_min_lat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['max_lat'], name='trip_max_lat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['min_lon'], name='trip_min_lon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['max_lon'], name='trip_max_lon_idx'),
+        ),
+    ]
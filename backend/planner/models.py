@@ -12,10 +12,26 @@ class Trip(models.Model):
     dropoff_location = models.CharField(max_length=255)
     current_cycle_hours = models.FloatField()
     total_distance = models.FloatField(null=True, blank=True)
+    distance_to_pickup = models.FloatField(null=True, blank=True)
+    distance_pickup_to_dropoff = models.FloatField(null=True, blank=True)
+    route = models.JSONField(null=True, blank=True)  # Columnar stop coordinates and duty-status segments
+    # Bounding box of the stops, for spatial lookups
+    min_lat = models.FloatField(null=True, blank=True)
+    max_lat = models.FloatField(null=True, blank=True)
+    min_lon = models.FloatField(null=True, blank=True)
+    max_lon = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        # One index per bounding-box edge so the planner can combine them
+        # (e.g. a Postgres BitmapAnd) for box-overlap queries
+        indexes = [
+            models.Index(fields=['min_lat'], name='trip_min_lat_idx'),
+            models.Index(fields=['max_lat'], name='trip_max_lat_idx'),
+            models.Index(fields=['min_lon'], name='trip_min_lon_idx'),
+            models.Index(fields=['max_lon'], name='trip_max_lon_idx'),
+        ]
 
     def __str__(self):
         return f"{self.pickup_location} → {self.dropoff_location}"
@@ -26,6 +42,8 @@ class DailyLog(models.Model):
     log_date = models.DateField()
     log_image = models.TextField()  # base64
     miles_driven = models.FloatField()
+    statuses = models.JSONField(default=list, blank=True)  # [start_hr, duration, line_id 1-4, remark]
+    sim_state = models.JSONField(null=True, blank=True)  # HOS simulation state at the start of this day
 
     class Meta:
         ordering = ['log_date']
@@ -0,0 +1,149 @@
+import base64
+from io import BytesIO
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+PAGE_WIDTH, PAGE_HEIGHT = landscape(letter)
+
+# Grid geometry (points): 24 hour columns, 4 duty rows
+GRID_LEFT = 150
+GRID_RIGHT = PAGE_WIDTH - 80
+GRID_TOP = 400
+ROW_HEIGHT = 30
+HOUR_WIDTH = (GRID_RIGHT - GRID_LEFT) / 24
+DUTY_ROWS = [(1, "1. Off Duty"), (2, "2. Sleeper Berth"), (3, "3. Driving"), (4, "4. On Duty Not Driving")]
+
+
+def _row_center(line_id):
+    """Y coordinate of the duty line for a status row (1 = top row)."""
+    return GRID_TOP - (line_id - 0.5) * ROW_HEIGHT
+
+
+def _hour_x(hour):
+    return GRID_LEFT + max(0, min(hour, 24)) * HOUR_WIDTH
+
+
+def draw_log_page(c, log_date, statuses, miles, driver_name="Driver"):
+    """Draw one FMCSA Driver's Daily Log page as vector graphics."""
+    # === HEADER ===
+    c.setFont("Helvetica-Bold", 16)
+    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - 40, "DRIVER'S DAILY LOG")
+    c.setFont("Helvetica", 10)
+    c.drawString(50, PAGE_HEIGHT - 65, f"Month/Day/Year: {log_date.strftime('%m/%d/%Y')}")
+    c.setFont("Helvetica", 8)
+    c.drawString(50, PAGE_HEIGHT - 78, "Original – File at home terminal.")
+    c.drawString(50, PAGE_HEIGHT - 88, "Duplicate – Driver retains in his/her possession for 8 days.")
+    c.setFont("Helvetica", 10)
+    c.drawString(50, PAGE_HEIGHT - 110, f"Driver's Name (First Name - Last Name): {driver_name.upper()}")
+    c.drawString(50, PAGE_HEIGHT - 124, "Name of Carrier: YOUR TRUCKING COMPANY LTD")
+    c.drawString(50, PAGE_HEIGHT - 138, "Main Terminal Address: 123 Truck Ave, Cotonou, Benin")
+    c.drawString(50, PAGE_HEIGHT - 152, "Truck/Tractor and Trailer Numbers or License Plate(s)/State (show each unit): T-001 / TL-456")
+    c.drawString(520, PAGE_HEIGHT - 110, f"Total Miles Driving Today: {miles:.0f}")
+    c.drawString(520, PAGE_HEIGHT - 124, f"Total Mileage Today: {miles:.0f}")
+
+    # === GRID BACKGROUND ===
+    grid_bottom = GRID_TOP - 4 * ROW_HEIGHT
+    c.setLineWidth(1.2)
+    c.rect(GRID_LEFT, grid_bottom, GRID_RIGHT - GRID_LEFT, GRID_TOP - grid_bottom)
+    for h in range(1, 24):
+        c.setLineWidth(1.5 if h == 12 else 0.5)
+        c.line(_hour_x(h), grid_bottom, _hour_x(h), GRID_TOP)
+    # Quarter-hour ticks
+    c.setLineWidth(0.3)
+    for q in range(96):
+        if q % 4 == 0:
+            continue
+        x = _hour_x(q / 4)
+        tick = 8 if q % 2 == 0 else 5
+        for line_id, _ in DUTY_ROWS:
+            row_bottom = GRID_TOP - line_id * ROW_HEIGHT
+            c.line(x, row_bottom, x, row_bottom + tick)
+    c.setFont("Helvetica-Bold", 9)
+    for line_id, label in DUTY_ROWS:
+        c.setLineWidth(1.2)
+        c.line(GRID_LEFT, GRID_TOP - line_id * ROW_HEIGHT, GRID_RIGHT, GRID_TOP - line_id * ROW_HEIGHT)
+        c.drawRightString(GRID_LEFT - 6, _row_center(line_id) - 3, label)
+
+    # X-axis labels
+    c.setFont("Helvetica", 8)
+    for h in range(25):
+        label = "Mid." if h in (0, 24) else "Noon" if h == 12 else str(h % 12)
+        c.drawCentredString(_hour_x(h), GRID_TOP + 5, label)
+
+    # === DRAW STATUS LINE ===
+    c.setLineWidth(2.5)
+    path = c.beginPath()
+    for i, (start_hr, duration, line_id, _) in enumerate(statuses):
+        if start_hr >= 24:
+            break
+        y = _row_center(line_id)
+        if i == 0:
+            path.moveTo(_hour_x(start_hr), y)
+        else:
+            path.lineTo(_hour_x(start_hr), y)  # Vertical change-of-duty connector
+        path.lineTo(_hour_x(start_hr + duration), y)
+    c.drawPath(path, stroke=1, fill=0)
+
+    # === TOTALS (Right side) ===
+    c.setFont("Helvetica", 9)
+    for line_id, _ in DUTY_ROWS:
+        total = sum(d for _, d, lid, _ in statuses if lid == line_id)
+        c.drawString(GRID_RIGHT + 8, _row_center(line_id) - 3, f"{total:.2f}")
+    c.drawString(GRID_RIGHT + 8, grid_bottom - 12, f"= {sum(d for _, d, _, _ in statuses):.2f}")
+
+    # === REMARKS ===
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(50, grid_bottom - 30, "Remarks:")
+    c.setFont("Helvetica", 8)
+    for i, (start_hr, _, _, remark) in enumerate(statuses[:15]):  # Max 15 remarks
+        time_str = f"{int(start_hr) % 24:02d}:{int((start_hr % 1) * 60):02d}"
+        column, row = divmod(i, 8)
+        c.drawString(60 + column * 240, grid_bottom - 44 - row * 11, f"{time_str} – {remark}")
+
+    total_driving = sum(d for _, d, lid, _ in statuses if lid == 3)
+    total_on_duty_nd = sum(d for _, d, lid, _ in statuses if lid == 4)
+    c.setFont("Helvetica", 9)
+    c.drawString(560, grid_bottom - 44, f"Line 3 (Driving): {total_driving:.1f} hrs")
+    c.drawString(560, grid_bottom - 56, f"Line 4 (On Duty): {total_on_duty_nd:.1f} hrs")
+    c.drawString(560, grid_bottom - 68, f"Total On Duty: {total_driving + total_on_duty_nd:.1f} hrs")
+
+    # Shipping Documents
+    c.setFont("Helvetica", 9)
+    c.drawString(50, 70, "Shipping Documents: BOL #123 | Shipper: Sample Co.")
+
+    # === SIGNATURE ===
+    c.setFont("Helvetica", 10)
+    c.drawString(50, 40, "Driver Signature/Certification of Daily Log:")
+    c.setLineWidth(1)
+    c.line(270, 38, 480, 38)
+    c.drawString(520, 40, f"Date: {log_date.strftime('%m/%d/%Y')}")
+
+
+def draw_raster_page(c, image_b64):
+    """Fallback for logs saved before statuses were persisted: embed the stored PNG."""
+    image = ImageReader(BytesIO(base64.b64decode(image_b64)))
+    width, height = image.getSize()
+    scale = min(PAGE_WIDTH / width, PAGE_HEIGHT / height)
+    c.drawImage(image, (PAGE_WIDTH - width * scale) / 2, (PAGE_HEIGHT - height * scale) / 2,
+                width * scale, height * scale)
+
+
+def render_trip_logs_pdf(trip, logs, driver_name="Driver"):
+    """Build a one-page-per-day PDF of a trip's logs and return its bytes.
+
+    Pages are drawn from each log's statuses; `log_image` is only read for
+    legacy rows that have none, so callers can defer it.
+    """
+    out = BytesIO()
+    c = canvas.Canvas(out, pagesize=(PAGE_WIDTH, PAGE_HEIGHT), pageCompression=1)
+    c.setTitle(f"Driver's Daily Logs - Trip {trip.id}")
+    c.setAuthor(driver_name)
+    for log in logs:
+        if log.statuses:
+            draw_log_page(c, log.log_date, log.statuses, log.miles_driven, driver_name=driver_name)
+        else:
+            draw_raster_page(c, log.log_image)
+        c.showPage()
+    c.save()
+    return out.getvalue()
@@ -0,0 +1,20 @@
+#renderers.py
+
+from rest_framework import renderers
+
+
+class PDFRenderer(renderers.BaseRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Successful PDF responses are built by the view; only error payloads
+        # (e.g. 404 for another user's trip) pass through here, as JSON.
+        if isinstance(data, bytes):
+            return data
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = renderers.JSONRenderer.media_type
+        return renderers.JSONRenderer().render(data)
@@ -16,8 +16,19 @@ class TripSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
         fields = ['id', 'current_location', 'pickup_location', 'dropoff_location', 
-                  'current_cycle_hours', 'total_distance', 'created_at', 'logs']
-        read_only_fields = ['id', 'created_at', 'total_distance']
+                  'current_cycle_hours', 'total_distance', 'route', 'created_at', 'logs']
+        read_only_fields = ['id', 'created_at', 'total_distance', 'route']
+
+
+class TripSummarySerializer(serializers.ModelSerializer):
+    """Trip with its stored route but without the log images."""
+
+    class Meta:
+        model = Trip
+        fields = ['id', 'current_location', 'pickup_location', 'dropoff_location',
+                  'current_cycle_hours', 'total_distance', 'distance_to_pickup',
+                  'distance_pickup_to_dropoff', 'route', 'created_at']
+        read_only_fields = fields
 
 
 class TripCreateSerializer(serializers.Serializer):
@@ -1,12 +1,20 @@
 #views.py
 
+import csv
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
 from .models import Trip, DailyLog
-from .serializers import TripSerializer, TripCreateSerializer
-from .hos_logic import plan_trip_and_save
+from .serializers import TripSerializer, TripCreateSerializer, TripSummarySerializer
+from .hos_logic import plan_trip_and_save, replan_trip_and_save, get_driver_name, ensure_log_images
+from .pdf_export import render_trip_logs_pdf
+from .export import API_EXPORT_MAX_IMAGES, API_EXPORT_MAX_PENDING_IMAGES, METADATA_FORMATS, iter_export
+from .bulk_import import IMPORT_FORMATS, parse_import_rows, import_trips
+from .geo import trips_near
+from .renderers import PDFRenderer
 
 
 class TripViewSet(viewsets.ModelViewSet):
@@ -34,11 +42,54 @@ class TripViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def list(self, request, *args, **kwargs):
+        pending = DailyLog.objects.filter(trip__user=request.user, log_image='')
+        ensure_log_images(pending, driver_name=get_driver_name(request.user))
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        trip = self.get_object()
+        ensure_log_images(trip.logs.all(), driver_name=get_driver_name(trip.user))
+        return Response(TripSerializer(trip).data)
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        trip = self.get_object()
+        serializer = TripCreateSerializer(data=request.data, partial=partial)
+        if serializer.is_valid():
+            try:
+                result = replan_trip_and_save(trip, serializer.validated_data)
+                trip.refresh_from_db()
+                response_serializer = TripSerializer(trip)
+                return Response({
+                    **response_serializer.data,
+                    'estimated_days': result['estimated_days'],
+                    'updated_days': result['updated_days']
+                })
+            except Exception as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=True, methods=['get'])
-    def logs(self, request, pk=None):
+    @action(detail=True, methods=['get'],
+            renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [PDFRenderer])
+    def logs(self, request, pk=None, format=None):
         trip = self.get_object()
+        if request.accepted_renderer.format == 'pdf':
+            # GET /api/trips/{id}/logs.pdf: vector pages drawn from the statuses
+            logs = trip.logs.defer('log_image')
+            response = HttpResponse(
+                render_trip_logs_pdf(trip, logs, driver_name=get_driver_name(trip.user)),
+                content_type='application/pdf'
+            )
+            response['Content-Disposition'] = f'attachment; filename="trip-{trip.id}-logs.pdf"'
+            return response
+
         logs = trip.logs.all()
+        ensure_log_images(logs, driver_name=get_driver_name(trip.user))
         log_data = [
             {
                 'id': log.id,
@@ -50,3 +101,82 @@ class TripViewSet(viewsets.ModelViewSet):
         ]
         return Response(log_data)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # ?metadata=ndjson|csv (default ndjson), &images=1 to get a ZIP with the log images
+        metadata_format = request.query_params.get('metadata', 'ndjson')
+        if metadata_format not in METADATA_FORMATS:
+            return Response(
+                {'error': f"metadata must be one of: {', '.join(METADATA_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        images = request.query_params.get('images', '').lower() in ('1', 'true', 'yes')
+        if images:
+            # A worker killed mid-stream leaves the client with a truncated ZIP, so refuse up front
+            logs = DailyLog.objects.filter(trip__user=request.user)
+            if (logs.count() > API_EXPORT_MAX_IMAGES
+                    or logs.filter(log_image='').count() > API_EXPORT_MAX_PENDING_IMAGES):
+                return Response(
+                    {'error': f"Too many log images to export over the API (limit {API_EXPORT_MAX_IMAGES}, "
+                              f"{API_EXPORT_MAX_PENDING_IMAGES} not yet rendered); export without images=1, "
+                              "or use `manage.py export_trips --images`"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        chunks, content_type, extension = iter_export(
+            self.get_queryset(), metadata_format=metadata_format, images=images
+        )
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="trips-export.{extension}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        # Multipart `file` upload, or a raw text/csv / application/x-ndjson body
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if not upload:
+                return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+            content = upload.read()
+            name_or_type = f"{upload.name} {upload.content_type}"
+        else:
+            # Read the body before DRF tries to parse it (there is no CSV/NDJSON parser)
+            content = request.body
+            name_or_type = request.content_type
+        input_format = request.query_params.get('input') or ('csv' if 'csv' in name_or_type else 'ndjson')
+        if input_format not in IMPORT_FORMATS:
+            return Response(
+                {'error': f"input must be one of: {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            rows = parse_import_rows(content.decode('utf-8-sig'), input_format)
+            result = import_trips(request.user, rows)
+        except (UnicodeDecodeError, ValueError, csv.Error) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(detail=False, methods=['get'])
+    def near(self, request):
+        # ?lat=..&lon=..&radius=<miles, default 50>: trips with a stop nearby, from stored coordinates only
+        try:
+            lat = float(request.query_params['lat'])
+            lon = float(request.query_params['lon'])
+            radius = float(request.query_params.get('radius', 50))
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'lat and lon are required numbers; radius is in miles'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180 and radius > 0):
+            return Response({'error': 'Coordinates or radius out of range'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = trips_near(self.get_queryset(), lat, lon, radius)
+        return Response([
+            {**TripSummarySerializer(trip).data, 'distance_miles': distance}
+            for trip, distance in results
+        ])
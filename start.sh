@@ -27,10 +27,11 @@ echo "🔗 Server will be available at http://0.0.0.0:${PORT:-8000}"
 exec gunicorn backend.wsgi:application \
   --name "trucklog-benin" \
   --bind "0.0.0.0:${PORT:-8000}" \
-  --workers 3 \
-  --worker-class sync \
-  --timeout 120 \
-  --max-requests 1000 \
+  --workers "${GUNICORN_WORKERS:-3}" \
+  --worker-class "${GUNICORN_WORKER_CLASS:-sync}" \
+  --threads "${GUNICORN_THREADS:-1}" \
+  --timeout "${GUNICORN_TIMEOUT:-120}" \
+  --max-requests "${GUNICORN_MAX_REQUESTS:-1000}" \
   --max-requests-jitter 100 \
   --log-level info \
   --access-logfile "-" \